@@ -1,8 +1,14 @@
 import os
-import base64
+import time
 import logging
+import threading
+from base64 import urlsafe_b64decode
+from collections import Counter
 from datetime import datetime, timedelta
+from functools import lru_cache
+from itertools import islice
 from googleapiclient.discovery import build
+from googleapiclient.errors import HttpError
 from google.oauth2.credentials import Credentials
 from google_auth_oauthlib.flow import InstalledAppFlow
 
@@ -10,6 +16,26 @@ logger = logging.getLogger(__name__)
 
 # Gmail API configuration
 SCOPES = ['https://www.googleapis.com/auth/gmail.readonly']
+# Gmail rate-limits batches of more than 50 sub-requests
+BATCH_SIZE = 50
+# Sub-requests rejected with 429 are retried, waiting BATCH_RETRY_DELAY
+# seconds before the first retry and twice as long before each next one
+BATCH_RETRIES = 5
+BATCH_RETRY_DELAY = 1.0
+# Partial-response masks: only the fields get_statement_emails reads are returned.
+# Messages stay in the default 'full' format because 'metadata' omits MIME parts
+# and with them the attachment ids.
+LIST_FIELDS = 'messages/id,nextPageToken'
+# Largest page size messages().list accepts
+LIST_PAGE_SIZE = 500
+MESSAGE_FIELDS = 'id,payload(headers(name,value),parts(filename,body/attachmentId))'
+ATTACHMENT_FIELDS = 'data'
+
+# Built Gmail service objects, keyed by user id, reused for the life of the process
+_SERVICE_CACHE = {}
+# Users are authenticated from concurrent threads; only one browser sign-in
+# may run at a time so each tab is clearly tied to its user
+_AUTH_FLOW_LOCK = threading.Lock()
 
 def authenticate_gmail(user_id, creds_dir):
     """
@@ -22,6 +48,9 @@ def authenticate_gmail(user_id, creds_dir):
     Returns:
         googleapiclient.discovery.Resource: Gmail service object or None if failed
     """
+    if user_id in _SERVICE_CACHE:
+        return _SERVICE_CACHE[user_id]
+
     creds = None
     token_path = os.path.join(creds_dir, f'token_{user_id}.json')
     credentials_path = os.path.join(creds_dir, 'credentials.json')
@@ -42,16 +71,94 @@ def authenticate_gmail(user_id, creds_dir):
                 logger.error("'credentials.json' not found in '%s'.", creds_dir)
                 return None
             
-            flow = InstalledAppFlow.from_client_secrets_file(credentials_path, SCOPES)
-            creds = flow.run_local_server(port=0)
+            with _AUTH_FLOW_LOCK:
+                print(f"Sign in to Gmail for user: {user_id}")
+                flow = InstalledAppFlow.from_client_secrets_file(credentials_path, SCOPES)
+                creds = flow.run_local_server(port=0)
         
         # Save the credentials for the next run
         with open(token_path, 'w') as token:
             token.write(creds.to_json())
             
-    return build('gmail', 'v1', credentials=creds)
+    # Use the discovery document bundled with the client instead of fetching it
+    service = build('gmail', 'v1', credentials=creds, cache_discovery=False, static_discovery=True)
+    _SERVICE_CACHE[user_id] = service
+    return service
 
-def get_statement_emails(service, sender_list, days_to_search=45):
+def _chunked(items, size):
+    """Yields successive lists of at most `size` items from an iterable."""
+    iterator = iter(items)
+    while True:
+        chunk = list(islice(iterator, size))
+        if not chunk:
+            return
+        yield chunk
+
+def _batch_execute(service, requests, transform=None):
+    """
+    Executes Gmail API requests through the HTTP batch endpoint.
+    
+    Args:
+        service: Gmail service object from authenticate_gmail()
+        requests (list): List of (request_id, HttpRequest) tuples
+        transform (callable): Optional function applied to each response as it arrives
+        
+    Returns:
+        dict: Responses keyed by request_id; failed sub-requests are omitted
+    """
+    responses = {}
+    rate_limited = []
+
+    def _collect(request_id, response, exception):
+        if exception is not None:
+            if isinstance(exception, HttpError) and exception.resp.status == 429:
+                rate_limited.append(request_id)
+                return
+            logger.debug("Batch request %s failed: %s", request_id, exception)
+            return
+        if transform is not None:
+            try:
+                response = transform(response)
+            except Exception as e:
+                logger.debug("Failed to process batch response %s: %s", request_id, e)
+                return
+        responses[request_id] = response
+
+    requests_by_id = dict(requests)
+    pending = list(requests)
+    delay = BATCH_RETRY_DELAY
+    for attempt in range(BATCH_RETRIES + 1):
+        for chunk in _chunked(pending, BATCH_SIZE):
+            batch = service.new_batch_http_request(callback=_collect)
+            for request_id, request in chunk:
+                batch.add(request, request_id=request_id)
+            batch.execute()
+
+        if not rate_limited:
+            break
+        # Resend only the rate-limited sub-requests, backing off each round
+        pending = [(request_id, requests_by_id[request_id]) for request_id in rate_limited]
+        rate_limited.clear()
+        if attempt < BATCH_RETRIES:
+            logger.debug("Retrying %d rate-limited batch requests in %.1fs", len(pending), delay)
+            time.sleep(delay)
+            delay *= 2
+    else:
+        logger.warning("Gave up on %d batch requests still rate-limited after %d retries",
+                       len(pending), BATCH_RETRIES)
+    return responses
+
+def _decode_attachment(attachment):
+    """Decodes the base64url payload of an attachments().get response."""
+    # urlsafe_b64decode accepts the ASCII str directly; no intermediate bytes copy
+    return urlsafe_b64decode(attachment['data'])
+
+@lru_cache(maxsize=None)
+def _build_from_query(senders):
+    """Builds the 'from:a OR from:b' clause for a tuple of sender domains."""
+    return " OR ".join(f"from:{sender}" for sender in senders)
+
+def get_statement_emails(service, sender_list, days_to_search=45, skip_message_ids=None):
     """
     Searches Gmail for statement emails with PDF attachments from a list of senders.
     
@@ -59,29 +166,53 @@ def get_statement_emails(service, sender_list, days_to_search=45):
         service: Gmail service object from authenticate_gmail()
         sender_list (list): List of email domains to search for (e.g., ['rblbank.com', 'axisbank.com'])
         days_to_search (int): Number of days back to search for emails
+        skip_message_ids (set): Message ids already processed; these are not downloaded
         
     Returns:
-        list: List of dictionaries containing PDF data, filename, and sender info
+        list: List of dictionaries containing PDF data, filename, and sender info,
+              plus the message id and how many PDFs that message attaches
     """
+    if not sender_list:
+        return []
+
     search_date = (datetime.now() - timedelta(days=days_to_search)).strftime('%Y/%m/%d')
     
     # Construct a query to find emails from any of the specified senders
-    from_query = " OR ".join([f"from:{sender}" for sender in sender_list])
+    from_query = _build_from_query(tuple(sender_list))
     query = f"({from_query}) has:attachment filename:pdf after:{search_date}"
     
     logger.debug("Searching Gmail with query: %s", query)
     
     try:
-        result = service.users().messages().list(userId='me', q=query).execute()
-        messages = result.get('messages', [])
+        # Follow nextPageToken so the whole search window is covered
+        messages = []
+        request = service.users().messages().list(
+            userId='me', q=query, maxResults=LIST_PAGE_SIZE, fields=LIST_FIELDS
+        )
+        while request is not None:
+            result = request.execute()
+            messages.extend(result.get('messages', []))
+            request = service.users().messages().list_next(request, result)
+        if skip_message_ids:
+            messages = [msg for msg in messages if msg['id'] not in skip_message_ids]
         
         emails_with_attachments = []
         if not messages:
             return emails_with_attachments
 
+        # Fetch all messages in batched round-trips instead of one request each
+        message_responses = _batch_execute(service, [
+            (msg['id'], service.users().messages().get(userId='me', id=msg['id'], fields=MESSAGE_FIELDS))
+            for msg in messages
+        ])
+
+        # Collect the PDF attachments referenced by each message
+        attachment_targets = []
         for msg in messages:
+            msg_data = message_responses.get(msg['id'])
+            if not msg_data:
+                continue
             try:
-                msg_data = service.users().messages().get(userId='me', id=msg['id']).execute()
                 payload = msg_data.get('payload', {})
                 parts = payload.get('parts', [])
                 
@@ -95,24 +226,36 @@ def get_statement_emails(service, sender_list, days_to_search=45):
                     if filename.lower().endswith('.pdf'):
                         attachment_id = part.get('body', {}).get('attachmentId')
                         if attachment_id:
-                            # Download the attachment
-                            attachment = service.users().messages().attachments().get(
-                                userId='me', messageId=msg['id'], id=attachment_id
-                            ).execute()
-                            
-                            # Decode the PDF data
-                            pdf_data = base64.urlsafe_b64decode(attachment['data'].encode('UTF-8'))
-                            
-                            emails_with_attachments.append({
-                                'pdf_data': pdf_data,
-                                'filename': filename,
-                                'sender': sender,
-                                'message_id': msg['id']
-                            })
+                            attachment_targets.append((msg['id'], attachment_id, filename, sender))
                             
             except Exception as e:
-                logger.debug("Failed to process message %s: %s", msg.get('id', 'unknown'), e)
+                logger.debug("Failed to process message %s: %s", msg['id'], e)
                 continue
+
+        # Download every attachment in a second batched pass. Each attachment is
+        # decoded as soon as its response arrives, so the base64 text is dropped
+        # right away instead of being held for the whole batch.
+        pdf_by_request = _batch_execute(service, [
+            (f"{msg_id}:{attachment_id}", service.users().messages().attachments().get(
+                userId='me', messageId=msg_id, id=attachment_id, fields=ATTACHMENT_FIELDS
+            ))
+            for msg_id, attachment_id, _, _ in attachment_targets
+        ], transform=_decode_attachment)
+
+        # Counted before downloads, so a failed download leaves its message short
+        pdf_counts = Counter(msg_id for msg_id, _, _, _ in attachment_targets)
+        for msg_id, attachment_id, filename, sender in attachment_targets:
+            pdf_data = pdf_by_request.get(f"{msg_id}:{attachment_id}")
+            if not pdf_data:
+                continue
+            
+            emails_with_attachments.append({
+                'pdf_data': pdf_data,
+                'filename': filename,
+                'sender': sender,
+                'message_id': msg_id,
+                'pdf_count': pdf_counts[msg_id]
+            })
                 
         return emails_with_attachments
         
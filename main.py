@@ -1,20 +1,40 @@
+import io
 import os
-import json
+import re
+import multiprocessing
+from collections import Counter
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+from functools import lru_cache, partial
 from rich.console import Console
 from rich.table import Table
 from rich import box
 
+# orjson is optional; it parses the same JSON faster than the stdlib
+try:
+    from orjson import loads as json_loads
+except ImportError:
+    from json import loads as json_loads
+
 # Import the comprehensive parser
 from parser import analyze_pdf
 # Import Gmail authentication functions
 from gmail_auth import authenticate_gmail, get_statement_emails
 
+# Shared Rich console for better output; its print is safe to call from worker threads
+console = Console()
+
 # Database functions
 import sqlite3
-import pandas as pd
 
 def init_db():
-    conn = sqlite3.connect('credit_statements.db')
+    # Autocommit mode; writes are grouped with explicit BEGIN/COMMIT
+    conn = sqlite3.connect('credit_statements.db', isolation_level=None)
+    conn.executescript('''
+        PRAGMA journal_mode=WAL;
+        PRAGMA synchronous=NORMAL;
+        PRAGMA temp_store=MEMORY;
+        PRAGMA cache_size=-65536;
+    ''')
     c = conn.cursor()
     c.execute('''
         CREATE TABLE IF NOT EXISTS bills (
@@ -31,20 +51,43 @@ def init_db():
             UNIQUE(user, card_last4, statement_date)
         )
     ''')
-    conn.commit()
+    # Serves display_bills' per-user lookup already sorted by due date
+    c.execute('CREATE INDEX IF NOT EXISTS idx_bills_user_duedate ON bills(user, due_date)')
+    # Gmail messages whose every PDF produced a bill; skipped on later runs
+    c.execute('''
+        CREATE TABLE IF NOT EXISTS seen_msgs (
+            user TEXT NOT NULL,
+            msg_id TEXT NOT NULL,
+            PRIMARY KEY(user, msg_id)
+        )
+    ''')
+    remove_duplicate_bills(conn)
     return conn
 
-def insert_bill(conn, bill_data, user):
-    c = conn.cursor()
+def remove_duplicate_bills(conn):
+    """One-time cleanup of duplicate rows left by older runs with NULL statement_date."""
+    if conn.execute('PRAGMA user_version').fetchone()[0] >= 1:
+        return
+    conn.execute('BEGIN')
+    # Keep the newest row per bill; the NULL-date duplicates are the older ones
+    conn.execute('''
+        DELETE FROM bills
+        WHERE id NOT IN (
+            SELECT MAX(id) FROM bills GROUP BY user, bank_name, card_last4, due_date
+        )
+    ''')
+    conn.execute('PRAGMA user_version = 1')
+    conn.commit()
+
+def get_seen_message_ids(conn, user):
+    """Returns the ids of Gmail messages already processed for a user."""
+    c = conn.execute('SELECT msg_id FROM seen_msgs WHERE user = ?', (user,))
+    return {row[0] for row in c}
+
+def append_bill(rows, bill_data, user):
     # Use due_date as fallback for statement_date to avoid NULL-based duplicates
     statement_date = bill_data.get('statement_date') or bill_data.get('due_date')
-    c.execute('''
-        INSERT OR IGNORE INTO bills (
-            user, bank_name, card_last4, statement_date, total_due, due_date,
-            min_due, credit_limit, available_limit
-        )
-        VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)
-    ''', (
+    rows.append((
         user,
         bill_data.get('bank_name'),
         bill_data.get('card_last4'),
@@ -55,29 +98,42 @@ def insert_bill(conn, bill_data, user):
         bill_data.get('credit_limit'),
         bill_data.get('available_limit')
     ))
+
+def insert_bills(conn, user, rows, seen_rows=()):
+    """Writes a user's buffered bill and (user, msg_id) rows and drops disallowed cards in one transaction."""
+    conn.execute('BEGIN')
+    conn.executemany('''
+        INSERT OR IGNORE INTO bills (
+            user, bank_name, card_last4, statement_date, total_due, due_date,
+            min_due, credit_limit, available_limit
+        )
+        VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)
+    ''', rows)
+    conn.executemany(
+        'INSERT OR IGNORE INTO seen_msgs (user, msg_id) VALUES (?, ?)', seen_rows
+    )
+    cleanup_disallowed_cards(conn, user)
     conn.commit()
 
+def _format_amount(value):
+    """Formats an amount as rupees, or 'N/A' when missing."""
+    return f"₹{float(value):,.2f}" if value is not None else "N/A"
+
 def display_bills(conn, user):
+    # Group in SQL in case older runs inserted multiple rows with NULL statement_date
     query = '''
-        SELECT bank_name, card_last4, min_due, total_due, due_date, 
-               available_limit, statement_date, credit_limit 
+        SELECT bank_name, card_last4, MIN(min_due), MIN(total_due), due_date, 
+               MIN(available_limit), MAX(statement_date), MIN(credit_limit) 
         FROM bills 
         WHERE user = ? 
+        GROUP BY bank_name, card_last4, due_date
         ORDER BY due_date
     '''
-    df = pd.read_sql_query(query, conn, params=[user])
-    # Drop duplicates in case older runs inserted multiple rows with NULL statement_date
-    df = df.drop_duplicates(subset=['bank_name', 'card_last4', 'due_date'])
-    if df.empty:
-        console = Console()
+    rows = conn.execute(query, (user,)).fetchall()
+    if not rows:
         console.print(f"No bills found in the database for user '{user}'.", style="yellow")
         return
     
-    # Format currency values and dates
-    for col in ['min_due', 'total_due', 'available_limit', 'credit_limit']:
-        df[col] = df[col].apply(lambda x: f"₹{float(x):,.2f}" if pd.notnull(x) else "N/A")
-    
-    console = Console()
     table = Table(title=f"Credit Card Bills - {user.capitalize()}", show_header=True, 
                  box=box.HORIZONTALS)
     table.add_column("Bank")
@@ -89,11 +145,12 @@ def display_bills(conn, user):
     table.add_column("Statement Date")
     table.add_column("Credit Limit")
 
-    for _, row in df.iterrows():
+    for (bank_name, card_last4, min_due, total_due, due_date,
+         available_limit, statement_date, credit_limit) in rows:
         table.add_row(
-            row['bank_name'], row['card_last4'], row['min_due'], 
-            row['total_due'], row['due_date'], row['available_limit'],
-            row['statement_date'] or "N/A", row['credit_limit']
+            bank_name, card_last4, _format_amount(min_due), 
+            _format_amount(total_due), due_date, _format_amount(available_limit),
+            statement_date or "N/A", _format_amount(credit_limit)
         )
     
     # Force the table to be printed
@@ -107,18 +164,133 @@ def display_bills(conn, user):
 USERS = ['rahul', 'gulshan'] # Add users you want to process
 DAYS_TO_SEARCH = 45 # As per your project description
 
-# Note: We're not filtering cards anymore - showing all valid cards
-# that meet statement/due date requirements
+# Optional per-user allow-list of card_last4 values, e.g. {'rahul': ['1234', '5678']}.
+# Users without an entry are not filtered - all valid cards that meet
+# statement/due date requirements are shown
+ALLOWED_CARDS = {}
 
 def cleanup_disallowed_cards(conn, user):
-    """Function kept for compatibility but no longer filters cards."""
-    # No filtering - all cards are allowed as long as they have valid dates
-    pass
+    """Deletes a user's bills for cards missing from ALLOWED_CARDS, inside the caller's transaction."""
+    allowed_cards = ALLOWED_CARDS.get(user)
+    if not allowed_cards:
+        # No filtering - all cards are allowed as long as they have valid dates
+        return
+    placeholders = ','.join('?' * len(allowed_cards))
+    conn.execute(
+        f'DELETE FROM bills WHERE user = ? AND card_last4 NOT IN ({placeholders})',
+        [user, *allowed_cards]
+    )
+
+@lru_cache(maxsize=None)
+def _load_config(creds_dir):
+    """Reads passwords.json and cc_statements.txt once per process."""
+    with open(os.path.join(creds_dir, 'passwords.json'), 'rb') as f:
+        passwords = json_loads(f.read())
+    # One read and one decode for the whole sender list
+    with open('cc_statements.txt', 'rb') as f:
+        lines = f.read().decode('utf-8').splitlines()
+    statement_senders = [line.strip() for line in lines if line.strip()]
+    return passwords, statement_senders
+
+def _parse_one(task):
+    """Parses one statement PDF, trying each password until one works."""
+    pdf_data, passwords_to_try, bank_name = task
+
+    # analyze_pdf reads straight from memory; no temporary file needed
+    pdf_buffer = io.BytesIO(pdf_data)
+    for pwd in passwords_to_try:
+        # Call the analysis function from the other module
+        parsed_data = analyze_pdf(pdf_buffer, pwd, bank_name)
+        if parsed_data:
+            return parsed_data  # Success with this password, no need to try others
+        # Silent on password failures
+    return None
+
+def process_user(user, *args, **kwargs):
+    """
+    Runs _process_user for one user, containing any failure to that user.
+    
+    An expired refresh token or a crashed parse worker is reported and the
+    user is skipped (None), so the other users' bills are still saved.
+    """
+    try:
+        return _process_user(user, *args, **kwargs)
+    except Exception as e:
+        console.print(f"ERROR: Failed to process user '{user}': {e}", style="red")
+        return None
+
+def _process_user(user, passwords, statement_senders, domain_to_bank, sender_pattern, creds_dir,
+                  pool, seen_ids=frozenset()):
+    """
+    Fetches and parses the statement emails of a single user.
+    
+    Runs in a worker thread, so it never touches the database. PDFs are
+    handed to the shared process pool for parsing. Messages in `seen_ids`
+    were processed by an earlier run and are not downloaded again.
+    
+    Returns:
+        tuple: (parsed bills, ids of messages to record as seen), or None if
+               the user was skipped. A message is only recorded once every PDF
+               in it produced a bill, so an attachment that failed (e.g. a card
+               whose password is not in passwords.json yet) is retried later.
+    """
+    user_passwords = passwords.get(user, {})
+    if not user_passwords:
+        console.print(f"WARNING: No passwords found for user '{user}' in passwords.json. Skipping.", style="red")
+        return None
+
+    service = authenticate_gmail(user, creds_dir)
+    if not service:
+        return None
+
+    # Only search senders whose bank this user has a password for
+    user_senders = [
+        domain for domain in statement_senders if domain_to_bank.get(domain) in user_passwords
+    ]
+    emails = get_statement_emails(service, user_senders, DAYS_TO_SEARCH, seen_ids)
+
+    if not emails:
+        console.print(f"No new statement emails found for {user}.", style="yellow")
+        return [], set()
+
+    tasks = []
+    message_ids = []
+    pdf_counts = {}
+    for email in emails:
+        pdf_counts[email['message_id']] = email['pdf_count']
+        # Determine the bank based on the sender domain
+        match = sender_pattern.search(email['sender'].lower()) if sender_pattern else None
+        if not match:
+            # Silent failure
+            continue
+        bank_name = domain_to_bank[match.group(0)]
+
+        password = user_passwords.get(bank_name)
+        if not password:
+            # Silent failure
+            continue
+        
+        # Handle password lists (like SBI) - try each password until one works
+        passwords_to_try = password if isinstance(password, list) else [password]
+        tasks.append((email['pdf_data'], passwords_to_try, bank_name))
+        message_ids.append(email['message_id'])
+
+    # PDF parsing is CPU-bound, so statements are parsed in worker processes
+    # All valid parsed statements are accepted; failures are silent
+    parsed_bills = []
+    bills_per_message = Counter()
+    for message_id, parsed_data in zip(message_ids, pool.map(_parse_one, tasks)):
+        if parsed_data:
+            parsed_bills.append(parsed_data)
+            bills_per_message[message_id] += 1
+    done_message_ids = {
+        message_id for message_id, pdf_count in pdf_counts.items()
+        if bills_per_message[message_id] >= pdf_count
+    }
+    return parsed_bills, done_message_ids
 
 def main():
     """Main function to orchestrate the credit card tracking process."""
-    # Use Rich console for better output
-    console = Console()
     console.print("[bold green]Credit Card Statement Tracker[/bold green]", justify="center")
     console.print("[dim]Automatically fetches and parses your credit card statements[/dim]", justify="center")
     console.print()
@@ -132,10 +304,7 @@ def main():
 
     # Load configuration files
     try:
-        with open(os.path.join(creds_dir, 'passwords.json'), 'r') as f:
-            passwords = json.load(f)
-        with open('cc_statements.txt', 'r') as f:
-            statement_senders = [line.strip() for line in f if line.strip()]
+        passwords, statement_senders = _load_config(creds_dir)
     except FileNotFoundError as e:
         print(f"ERROR: Configuration file not found - {e}. Please ensure 'passwords.json' (in creds folder) and 'cc_statements.txt' exist.")
         return
@@ -143,85 +312,56 @@ def main():
     # Create a mapping from domain to bank name (matching passwords.json keys)
     # e.g. {'rblbank.com': 'rbl', ...}
     domain_to_bank = {}
-    for bank in passwords.get('rahul', {}):
+    # dict.fromkeys dedupes while keeping passwords.json order, so a domain
+    # matching two banks maps the same way on every run
+    for bank in dict.fromkeys(bank for user in USERS for bank in passwords.get(user, {})):
         for domain in statement_senders:
             if bank in domain or domain.startswith(bank):
                 domain_to_bank[domain] = bank
 
+    # One compiled alternation finds the sender domain in a single scan
+    sender_pattern = None
+    if domain_to_bank:
+        sender_pattern = re.compile('|'.join(re.escape(domain) for domain in domain_to_bank))
 
     # Initialize database
     conn = init_db()
     
-    console = Console()
-    for user in USERS:
-        console.print(f"\n[blue]Processing for user: {user}[/blue]")
-        user_passwords = passwords.get(user, {})
-        if not user_passwords:
-            console.print(f"WARNING: No passwords found for user '{user}' in passwords.json. Skipping.", style="red")
-            continue
+    # Users are fetched and parsed concurrently; results are written to
+    # SQLite from this thread only
+    console.print(f"[blue]Processing users: {', '.join(USERS)}[/blue]")
+    seen_by_user = {user: get_seen_message_ids(conn, user) for user in USERS}
+    # Workers are started from the user threads, so they must not be forked
+    # from this multi-threaded process (a child could inherit a held lock)
+    start_method = 'forkserver' if 'forkserver' in multiprocessing.get_all_start_methods() else 'spawn'
+    with ProcessPoolExecutor(mp_context=multiprocessing.get_context(start_method)) as pool:
+        worker = partial(process_user, passwords=passwords, statement_senders=statement_senders,
+                         domain_to_bank=domain_to_bank, sender_pattern=sender_pattern,
+                         creds_dir=creds_dir, pool=pool)
+        with ThreadPoolExecutor(max_workers=len(USERS)) as executor:
+            futures = [executor.submit(worker, user, seen_ids=seen_by_user[user]) for user in USERS]
+            results = [future.result() for future in futures]
 
-        service = authenticate_gmail(user, creds_dir)
-        if not service:
+    for user, result in zip(USERS, results):
+        if result is None:
             continue
+        parsed_bills, done_message_ids = result
 
-        emails = get_statement_emails(service, statement_senders, DAYS_TO_SEARCH)
+        console.print(f"\n[blue]Results for user: {user}[/blue]")
 
-        if not emails:
-            console.print(f"No new statement emails found for {user}.", style="yellow")
-            continue
-            
+        # Parsed bills are buffered and written in one transaction per user
+        bill_rows = []
+        seen_rows = [(user, message_id) for message_id in done_message_ids]
         # We'll collect successful cards to display later
         successful_cards = []
+        for parsed_data in parsed_bills:
+            append_bill(bill_rows, parsed_data, user)
+            card_num = parsed_data.get('card_last4', 'Unknown')
+            bank = parsed_data.get('bank_name', 'Unknown')
+            successful_cards.append((bank, card_num))
 
-        for email in emails:
-            # Determine the bank based on the sender domain
-            bank_name = None
-            sender_lower = email['sender'].lower()
-            for domain, bank in domain_to_bank.items():
-                if domain in sender_lower:
-                    bank_name = bank
-                    break
-
-            if not bank_name:
-                # Silent failure
-                continue
-
-            password = user_passwords.get(bank_name)
-            if not password:
-                # Silent failure
-                continue
-            
-            # Handle password lists (like SBI) - try each password until one works
-            passwords_to_try = password if isinstance(password, list) else [password]
-            
-            parsed_data = None
-            for pwd in passwords_to_try:
-                # To use analyze_pdf, we need to write the data to a temporary file
-                temp_pdf_path = f"temp_{email['filename']}"
-                with open(temp_pdf_path, 'wb') as f:
-                    f.write(email['pdf_data'])
-                
-                # Call the analysis function from the other module
-                parsed_data = analyze_pdf(temp_pdf_path, pwd, bank_name)
-                
-                # Clean up the temporary file
-                os.remove(temp_pdf_path)
-                
-                if parsed_data:
-                    break  # Success with this password, no need to try others
-                # Silent on password failures
-
-            if parsed_data:
-                # All valid parsed statements are accepted
-                insert_bill(conn, parsed_data, user)
-                card_num = parsed_data.get('card_last4', 'Unknown')
-                bank = parsed_data.get('bank_name', 'Unknown')
-                # Save for summary display later
-                successful_cards.append((bank, card_num))
-            # Failures are now silent
-
-        # Clean up any disallowed cards
-        cleanup_disallowed_cards(conn, user)
+        # Also cleans up any disallowed cards
+        insert_bills(conn, user, bill_rows, seen_rows)
         
         # Display success message for each card
         if successful_cards:
@@ -235,4 +375,4 @@ def main():
     conn.close()
 
 if __name__ == '__main__':
-    main()
+    main()
\ No newline at end of file
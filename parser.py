@@ -1,39 +1,54 @@
 import re
 import json
 import os
+import sys
 import logging
+import hashlib
+import multiprocessing
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from contextlib import nullcontext
+from functools import lru_cache
 import pdfplumber
 import PyPDF2
-from datetime import datetime
+from pdfminer.pdfdocument import PDFPasswordIncorrect
+from datetime import date, datetime
+
+# RE2 (google-re2) is optional; it matches the bank patterns in linear time
+try:
+    import re2 as pattern_engine
+except ImportError:
+    pattern_engine = re
 
 logger = logging.getLogger(__name__)
 
 # --- COMPREHENSIVE BANK PATTERNS DATABASE ---
 # Consolidated from analyze_pdf.py, parser.py, and enhanced with additional robustness
+# {GAP} stands for LINE_GAP (defined below): the shortest run of text up to the
+# value, on the same line or at most two lines further down
 COMPREHENSIVE_BANK_PATTERNS = {
     'sbi': {
         'card_number': [
             r'XXXX XXXX XXXX (\w+)',
             r'XXXX XXXX XXXX (\w{2,4})',
-            r'Credit Card Number.*?XXXX XXXX XXXX (\w+)',
+            r'Credit Card Number{GAP}XXXX XXXX XXXX (\w+)',
             r'XXXX\s+XXXX\s+XXXX\s+XX(\d{2,4})'
         ],
         'statement_date': [
             r'Statement\s*Date\s*[:\-]?\s*(\d{2}\s+[A-Za-z]{3}\s+\d{4})',
             r'Statement\s*Date\s*[:\-]?\s*(\d{1,2}\s+[A-Za-z]+\s+\d{4})',
-            r'Statement.*?Date.*?(\d{2}/\d{2}/\d{4})',
-            r'Statement.*?(\d{2}-\d{2}-\d{4})'
+            r'Statement{GAP}Date{GAP}(\d{2}/\d{2}/\d{4})',
+            r'Statement{GAP}(\d{2}-\d{2}-\d{4})'
         ],
         'total_due': [
             r'Total Payment Due\s*[:\-]?\s*₹?\s*([\d,]+\.\d{2})',
             r'Total Amount Due\s*[:\-]?\s*₹?\s*([\d,]+\.\d{2})',
-            r'\*Total Amount Due.*?([\d,]+\.\d{2})'
+            r'\*Total Amount Due{GAP}([\d,]+\.\d{2})'
         ],
         'due_date': [
             # Label on one line, date on next line or far right
-            r'Payment\s+Due\s+Date[\s:\-.]*?(?:\r?\n|\s)+.*?([0-3]?\d\s+[A-Za-z]{3}\s+\d{4})',
-            r'Payment\s+Due\s+Date[\s:\-.]*?(?:\r?\n|\s)+.*?(\d{2}/\d{2}/\d{4})',
-            r'Payment\s+Due\s+Date[\s:\-.]*?(?:\r?\n|\s)+.*?(\d{2}-[A-Za-z]{3}-\d{4})',
+            r'Payment\s+Due\s+Date[\s:\-.]*?(?:\r?\n|\s)+{GAP}([0-3]?\d\s+[A-Za-z]{3}\s+\d{4})',
+            r'Payment\s+Due\s+Date[\s:\-.]*?(?:\r?\n|\s)+{GAP}(\d{2}/\d{2}/\d{4})',
+            r'Payment\s+Due\s+Date[\s:\-.]*?(?:\r?\n|\s)+{GAP}(\d{2}-[A-Za-z]{3}-\d{4})',
             # Same-line variants
             r'(?:Total\s+)?Payment\s+Due\s+Date\s*[:\-]?\s*([0-3]?\d\s+[A-Za-z]{3}\s+\d{4})',
             r'Payment\s+Due\s+Date\s*[:\-]?\s*(\d{2}-[A-Za-z]{3}-\d{4})',
@@ -41,61 +56,61 @@ COMPREHENSIVE_BANK_PATTERNS = {
         ],
         'min_due': [
             r'Minimum\s+(?:Amount|Payment)\s+Due\s*[:\-]?\s*₹?\s*([\d,]+\.\d{2})',
-            r'\*\*Minimum Amount Due.*?([\d,]+\.\d{2})'
+            r'\*\*Minimum Amount Due{GAP}([\d,]+\.\d{2})'
         ],
         'credit_limit': [
-            r'Credit\s+Limit\s*\(.*?\)\s*[:\-]?\s*₹?\s*([\d,]+\.\d{2})',
-            r'Credit\s+Limit.*?₹?\s*([\d,]+\.\d{2})'
+            r'Credit\s+Limit\s*\({GAP}\)\s*[:\-]?\s*₹?\s*([\d,]+\.\d{2})',
+            r'Credit\s+Limit{GAP}₹?\s*([\d,]+\.\d{2})'
         ],
         'available_limit': [
             r'Available\s+Credit\s+Limit\s*[:\-]?\s*₹?\s*([\d,]+\.\d{2})',
-            r'Available.*?Limit.*?₹?\s*([\d,]+\.\d{2})'
+            r'Available{GAP}Limit{GAP}₹?\s*([\d,]+\.\d{2})'
         ]
     },
     'indusind': {
         'card_number': [
             r'Credit Card No\. (\d{4})XXXXXXXX(\d{4})',
             r'Credit Card No\.\s+\d{4}X+(\d{4})',
-            r'Card.*?No.*?(\d{4})XXXXXXXX(\d{4})',
+            r'Card{GAP}No{GAP}(\d{4})XXXXXXXX(\d{4})',
             r'(\d{4})\*+(\d{4})'
         ],
         'statement_date': [
             r'Statement Date\s+(\d{2}/\d{2}/\d{4})',
-            r'Statement.*?Date.*?(\d{2}/\d{2}/\d{4})',
-            r'Statement.*?(\d{2}-\d{2}-\d{4})'
+            r'Statement{GAP}Date{GAP}(\d{2}/\d{2}/\d{4})',
+            r'Statement{GAP}(\d{2}-\d{2}-\d{4})'
         ],
         'total_due': [
-            r'Total Amount Due[\s\S]*?([\d,]+\.\d{2}) DR',
+            r'Total Amount Due{GAP}([\d,]+\.\d{2}) DR',
             r'Total Amount Due\s+([\d,]+\.\d{2})\s+DR',
-            r'Total.*?Due.*?([\d,]+\.\d{2})',
-            r'Amount Due.*?([\d,]+\.\d{2})'
+            r'Total{GAP}Due{GAP}([\d,]+\.\d{2})',
+            r'Amount Due{GAP}([\d,]+\.\d{2})'
         ],
         'due_date': [
             r'Payment Due Date\s+(\d{2}/\d{2}/\d{4})',
-            r'Due Date.*?(\d{2}/\d{2}/\d{4})',
-            r'Pay.*?by.*?(\d{2}/\d{2}/\d{4})'
+            r'Due Date{GAP}(\d{2}/\d{2}/\d{4})',
+            r'Pay{GAP}by{GAP}(\d{2}/\d{2}/\d{4})'
         ],
         'min_due': [
             r'Minimum Amount Due\s+([\d,]+\.\d{2})',
-            r'Min.*?Due.*?([\d,]+\.\d{2})',
-            r'MAD.*?([\d,]+\.\d{2})'
+            r'Min{GAP}Due{GAP}([\d,]+\.\d{2})',
+            r'MAD{GAP}([\d,]+\.\d{2})'
         ],
         'credit_limit': [
-            r'Credit.*?Credit Limit\s+([\d,]+\.\d{2})',
-            r'Total.*?Limit.*?([\d,]+\.\d{2})',
-            r'Credit Limit.*?([\d,]+\.\d{2})'
+            r'Credit{GAP}Credit Limit\s+([\d,]+\.\d{2})',
+            r'Total{GAP}Limit{GAP}([\d,]+\.\d{2})',
+            r'Credit Limit{GAP}([\d,]+\.\d{2})'
         ],
         'available_limit': [
             r'Available Credit Limit\s+([\d,]+\.\d{2})',
-            r'Available.*?Limit.*?([\d,]+\.\d{2})'
+            r'Available{GAP}Limit{GAP}([\d,]+\.\d{2})'
         ]
     },
     'axis': {
         'card_number': [
             r'(\d{6})\*+(\d{4})',
             r'(\d{4})\*+(\d{4})',
-            r'Card.*?(\d{6})\*+(\d{4})',
-            r'Neo.*?(\d{6})\*+(\d{4})'
+            r'Card{GAP}(\d{6})\*+(\d{4})',
+            r'Neo{GAP}(\d{6})\*+(\d{4})'
         ],
         'statement_date': [
             r'Statement\s*Date\s*[:\-]?\s*(\d{2}/\d{2}/\d{4})',
@@ -103,220 +118,344 @@ COMPREHENSIVE_BANK_PATTERNS = {
         ],
         'total_due': [
             r'([\d,]+\.\d{2}) Dr\s+([\d,]+\.\d{2}) Dr',
-            r'Total Payment Due.*?([\d,]+\.\d{2})',
-            r'Total.*?Due.*?([\d,]+\.\d{2}) Dr',
-            r'Amount Due.*?([\d,]+\.\d{2})'
+            r'Total Payment Due{GAP}([\d,]+\.\d{2})',
+            r'Total{GAP}Due{GAP}([\d,]+\.\d{2}) Dr',
+            r'Amount Due{GAP}([\d,]+\.\d{2})'
         ],
         'due_date': [
             r'(\d{2}/\d{2}/\d{4})\s+(\d{2}/\d{2}/\d{4})\s*$',
-            r'Payment Due Date.*?(\d{2}/\d{2}/\d{4})',
-            r'Due.*?(\d{2}/\d{2}/\d{4})'
+            r'Payment Due Date{GAP}(\d{2}/\d{2}/\d{4})',
+            r'Due{GAP}(\d{2}/\d{2}/\d{4})'
         ],
         'min_due': [
             r'([\d,]+\.\d{2}) Dr\s+([\d,]+\.\d{2}) Dr',
-            r'Minimum Payment Due.*?([\d,]+\.\d{2})',
-            r'Min.*?Due.*?([\d,]+\.\d{2})'
+            r'Minimum Payment Due{GAP}([\d,]+\.\d{2})',
+            r'Min{GAP}Due{GAP}([\d,]+\.\d{2})'
         ],
         'credit_limit': [
             r'Credit Limit\s+([\d,]+\.\d{2})',
-            r'Total.*?Limit.*?([\d,]+\.\d{2})'
+            r'Total{GAP}Limit{GAP}([\d,]+\.\d{2})'
         ],
         'available_limit': [
             r'Available Credit Limit\s+([\d,]+\.\d{2})',
-            r'Available.*?Limit.*?([\d,]+\.\d{2})'
+            r'Available{GAP}Limit{GAP}([\d,]+\.\d{2})'
         ]
     },
     'icici': {
         'card_number': [
             r'(\d{4})XXXXXXXX(\d{4})',
             r'(\d{4})\*+(\d{4})',
-            r'Card.*?(\d{4})XXXXXXXX(\d{4})',
-            r'Credit Card.*?(\d{4})\*+(\d{4})'
+            r'Card{GAP}(\d{4})XXXXXXXX(\d{4})',
+            r'Credit Card{GAP}(\d{4})\*+(\d{4})'
         ],
         'statement_date': [
             r'SSTTAATTEEMMEENNTT DDAATTEE\s+(\w+ \d{1,2}, \d{4})',
-            r'Statement.*?Date.*?(\w+ \d{1,2}, \d{4})',
-            r'Statement.*?(\d{2}/\d{2}/\d{4})',
-            r'STATEMENT.*?(\d{2}/\d{2}/\d{4})'
+            r'Statement{GAP}Date{GAP}(\w+ \d{1,2}, \d{4})',
+            r'Statement{GAP}(\d{2}/\d{2}/\d{4})',
+            r'STATEMENT{GAP}(\d{2}/\d{2}/\d{4})'
         ],
         'total_due': [
             r'Total Amount due\s+-\s+`([\d,]+\.\d{2})',
-            r'Total.*?due.*?`([\d,]+\.\d{2})',
-            r'Total Amount.*?([\d,]+\.\d{2})',
-            r'Amount due.*?([\d,]+\.\d{2})',
+            r'Total{GAP}due{GAP}`([\d,]+\.\d{2})',
+            r'Total Amount{GAP}([\d,]+\.\d{2})',
+            r'Amount due{GAP}([\d,]+\.\d{2})',
             r'TOTAL\s+([\d,]+\.\d{2})'
         ],
         'due_date': [
             r'PPAAYYMMEENNTT DDUUEE DDAATTEE\s+(\w+ \d{1,2}, \d{4})',
-            r'Payment.*?Due.*?Date.*?(\w+ \d{1,2}, \d{4})',
-            r'Due Date.*?(\d{2}/\d{2}/\d{4})',
-            r'PAYMENT.*?DUE.*?(\d{2}/\d{2}/\d{4})'
+            r'Payment{GAP}Due{GAP}Date{GAP}(\w+ \d{1,2}, \d{4})',
+            r'Due Date{GAP}(\d{2}/\d{2}/\d{4})',
+            r'PAYMENT{GAP}DUE{GAP}(\d{2}/\d{2}/\d{4})'
         ],
         'min_due': [
-            r'Minimum Amount due.*?`([\d,]+\.\d{2})',
-            r'Minimum.*?due.*?([\d,]+\.\d{2})',
-            r'Min.*?Amount.*?([\d,]+\.\d{2})'
+            r'Minimum Amount due{GAP}`([\d,]+\.\d{2})',
+            r'Minimum{GAP}due{GAP}([\d,]+\.\d{2})',
+            r'Min{GAP}Amount{GAP}([\d,]+\.\d{2})'
         ],
         'credit_limit': [
-            r'Credit Limit \(Including cash\).*?`([\d,]+\.\d{2})',
-            r'Credit Limit.*?`([\d,]+\.\d{2})',
-            r'Total.*?Limit.*?([\d,]+\.\d{2})'
+            r'Credit Limit \(Including cash\){GAP}`([\d,]+\.\d{2})',
+            r'Credit Limit{GAP}`([\d,]+\.\d{2})',
+            r'Total{GAP}Limit{GAP}([\d,]+\.\d{2})'
         ],
         'available_limit': [
-            r'Available Credit \(Including cash\).*?`([\d,]+\.\d{2})',
-            r'Available.*?Credit.*?`([\d,]+\.\d{2})',
-            r'Available.*?([\d,]+\.\d{2})'
+            r'Available Credit \(Including cash\){GAP}`([\d,]+\.\d{2})',
+            r'Available{GAP}Credit{GAP}`([\d,]+\.\d{2})',
+            r'Available{GAP}([\d,]+\.\d{2})'
         ]
     },
     'kotak': {
         'card_number': [
             r'(\d{4})XXXXXXXX(\d{4})',
             r'(\d{4})\*+(\d{4})',
-            r'Card.*?(\d{4})XXXXXXXX(\d{4})'
+            r'Card{GAP}(\d{4})XXXXXXXX(\d{4})'
         ],
         'statement_date': [
             r'Statement Date (\d{2}-\w{3}-\d{4})',
-            r'Statement.*?Date.*?(\d{2}-\w{3}-\d{4})',
-            r'Statement.*?(\d{2}/\d{2}/\d{4})'
+            r'Statement{GAP}Date{GAP}(\d{2}-\w{3}-\d{4})',
+            r'Statement{GAP}(\d{2}/\d{2}/\d{4})'
         ],
         'total_due': [
             r'Total Amount Due \(TAD\) Rs\.([\d,]+\.\d{2})',
-            r'Total.*?Due.*?Rs\.([\d,]+\.\d{2})',
-            r'TAD.*?Rs\.([\d,]+\.\d{2})',
-            r'Amount Due.*?([\d,]+\.\d{2})'
+            r'Total{GAP}Due{GAP}Rs\.([\d,]+\.\d{2})',
+            r'TAD{GAP}Rs\.([\d,]+\.\d{2})',
+            r'Amount Due{GAP}([\d,]+\.\d{2})'
         ],
         'due_date': [
             r'Remember to pay by (\d{2}-\w{3}-\d{4})',
             r'Pay by (\d{2}-\w{3}-\d{4})',
-            r'Due.*?(\d{2}-\w{3}-\d{4})',
-            r'Payment.*?(\d{2}/\d{2}/\d{4})'
+            r'Due{GAP}(\d{2}-\w{3}-\d{4})',
+            r'Payment{GAP}(\d{2}/\d{2}/\d{4})'
         ],
         'min_due': [
             r'Minimum Amount Due \(MAD\) Rs\.([\d,]+\.\d{2})',
-            r'MAD.*?Rs\.([\d,]+\.\d{2})',
-            r'Minimum.*?Rs\.([\d,]+\.\d{2})'
+            r'MAD{GAP}Rs\.([\d,]+\.\d{2})',
+            r'Minimum{GAP}Rs\.([\d,]+\.\d{2})'
         ],
         'credit_limit': [
             r'Total Credit Limit \(incl\.cash\): Rs\.([\d,]+\.\d{2})',
-            r'Credit Limit.*?Rs\.([\d,]+\.\d{2})',
-            r'Total.*?Limit.*?Rs\.([\d,]+\.\d{2})'
+            r'Credit Limit{GAP}Rs\.([\d,]+\.\d{2})',
+            r'Total{GAP}Limit{GAP}Rs\.([\d,]+\.\d{2})'
         ],
         'available_limit': [
             r'Available Credit Limit: Rs\.([\d,]+\.\d{2})',
-            r'Available.*?Rs\.([\d,]+\.\d{2})',
-            r'Available.*?Limit.*?([\d,]+\.\d{2})'
+            r'Available{GAP}Rs\.([\d,]+\.\d{2})',
+            r'Available{GAP}Limit{GAP}([\d,]+\.\d{2})'
         ]
     },
     'rbl': {
         'card_number': [
             r'XXXXXXXXXXXXXX(\d{2})',
             r'(\d{4})\*+(\d{4})',
-            r'Card.*?(\d{4})\*+(\d{4})',
-            r'XXXX.*?(\d{4})'
+            r'Card{GAP}(\d{4})\*+(\d{4})',
+            r'XXXX{GAP}(\d{4})'
         ],
         'statement_date': [
             r'Statement Date\s+(\d{2}-\d{2}-\d{4})',
-            r'Statement.*?Date.*?(\d{2}-\d{2}-\d{4})',
-            r'Statement.*?(\d{2}/\d{2}/\d{4})'
+            r'Statement{GAP}Date{GAP}(\d{2}-\d{2}-\d{4})',
+            r'Statement{GAP}(\d{2}/\d{2}/\d{4})'
         ],
         'total_due': [
             r'Total Amount Due\s+([\d,]+\.\d{2})',
-            r'Total.*?Due.*?([\d,]+\.\d{2})',
-            r'Amount Due.*?([\d,]+\.\d{2})'
+            r'Total{GAP}Due{GAP}([\d,]+\.\d{2})',
+            r'Amount Due{GAP}([\d,]+\.\d{2})'
         ],
         'due_date': [
             r'Payment Due Date\s+(\d{2} \w{3} \d{4})',
-            r'Due Date.*?(\d{2} \w{3} \d{4})',
-            r'Payment.*?(\d{2}/\d{2}/\d{4})'
+            r'Due Date{GAP}(\d{2} \w{3} \d{4})',
+            r'Payment{GAP}(\d{2}/\d{2}/\d{4})'
         ],
         'min_due': [
             r'Min\. Amt\. Due\s+([\d,]+\.\d{2})',
-            r'Minimum.*?Due.*?([\d,]+\.\d{2})',
-            r'Min.*?Due.*?([\d,]+\.\d{2})'
+            r'Minimum{GAP}Due{GAP}([\d,]+\.\d{2})',
+            r'Min{GAP}Due{GAP}([\d,]+\.\d{2})'
         ],
         'credit_limit': [
             r'Total Credit Limit\s+([\d,]+\.\d{2})',
-            r'Credit Limit.*?([\d,]+\.\d{2})',
-            r'Total.*?Limit.*?([\d,]+\.\d{2})'
+            r'Credit Limit{GAP}([\d,]+\.\d{2})',
+            r'Total{GAP}Limit{GAP}([\d,]+\.\d{2})'
         ],
         'available_limit': [
             r'Available Credit Limit\s+([\d,]+\.\d{2})',
-            r'Available.*?Limit.*?([\d,]+\.\d{2})'
+            r'Available{GAP}Limit{GAP}([\d,]+\.\d{2})'
         ]
     },
     'hdfc': {
         'card_number': [
             r'(\d{4})\s*\*+\s*(\d{4})',
             r'(\d{4})XXXXXXXX(\d{4})',
-            r'Card.*?(\d{4})\*+(\d{4})',
-            r'HDFC.*?(\d{4})\*+(\d{4})'
+            r'Card{GAP}(\d{4})\*+(\d{4})',
+            r'HDFC{GAP}(\d{4})\*+(\d{4})'
         ],
         'statement_date': [
             r'Statement Date\s*:?\s*(\d{2}/\d{2}/\d{4})',
-            r'Statement.*?(\d{2}-\d{2}-\d{4})',
-            r'Date.*?(\d{2}/\d{2}/\d{4})'
+            r'Statement{GAP}(\d{2}-\d{2}-\d{4})',
+            r'Date{GAP}(\d{2}/\d{2}/\d{4})'
         ],
         'total_due': [
             r'Total Amount Due\s*:?\s*Rs\.?\s*([\d,]+\.\d{2})',
-            r'Total.*?Due.*?Rs\.?\s*([\d,]+\.\d{2})',
-            r'Amount Due.*?([\d,]+\.\d{2})'
+            r'Total{GAP}Due{GAP}Rs\.?\s*([\d,]+\.\d{2})',
+            r'Amount Due{GAP}([\d,]+\.\d{2})'
         ],
         'due_date': [
             r'Payment Due Date\s*:?\s*(\d{2}/\d{2}/\d{4})',
-            r'Due Date.*?(\d{2}/\d{2}/\d{4})',
-            r'Pay.*?by.*?(\d{2}/\d{2}/\d{4})'
+            r'Due Date{GAP}(\d{2}/\d{2}/\d{4})',
+            r'Pay{GAP}by{GAP}(\d{2}/\d{2}/\d{4})'
         ],
         'min_due': [
             r'Minimum Amount Due\s*:?\s*Rs\.?\s*([\d,]+\.\d{2})',
-            r'Min.*?Due.*?Rs\.?\s*([\d,]+\.\d{2})',
-            r'Minimum.*?([\d,]+\.\d{2})'
+            r'Min{GAP}Due{GAP}Rs\.?\s*([\d,]+\.\d{2})',
+            r'Minimum{GAP}([\d,]+\.\d{2})'
         ],
         'credit_limit': [
             r'Credit Limit\s*:?\s*Rs\.?\s*([\d,]+\.\d{2})',
-            r'Total.*?Limit.*?Rs\.?\s*([\d,]+\.\d{2})'
+            r'Total{GAP}Limit{GAP}Rs\.?\s*([\d,]+\.\d{2})'
         ],
         'available_limit': [
             r'Available Credit\s*:?\s*Rs\.?\s*([\d,]+\.\d{2})',
-            r'Available.*?Rs\.?\s*([\d,]+\.\d{2})'
+            r'Available{GAP}Rs\.?\s*([\d,]+\.\d{2})'
         ]
     },
     'bob': {
         'card_number': [
             r'(\d{4})\s*\*+\s*(\d{4})',
             r'(\d{4})XXXXXXXX(\d{4})',
-            r'Card.*?(\d{4})\*+(\d{4})'
+            r'Card{GAP}(\d{4})\*+(\d{4})'
         ],
         'statement_date': [
             r'Statement Date\s*:?\s*(\d{2}/\d{2}/\d{4})',
-            r'Statement.*?(\d{2}-\d{2}-\d{4})',
-            r'Date.*?(\d{2}/\d{2}/\d{4})'
+            r'Statement{GAP}(\d{2}-\d{2}-\d{4})',
+            r'Date{GAP}(\d{2}/\d{2}/\d{4})'
         ],
         'total_due': [
             r'Total Amount Due\s*:?\s*([\d,]+\.\d{2})',
-            r'Total.*?Due.*?([\d,]+\.\d{2})',
-            r'Amount Due.*?([\d,]+\.\d{2})'
+            r'Total{GAP}Due{GAP}([\d,]+\.\d{2})',
+            r'Amount Due{GAP}([\d,]+\.\d{2})'
         ],
         'due_date': [
             r'Payment Due Date\s*:?\s*(\d{2}/\d{2}/\d{4})',
-            r'Due Date.*?(\d{2}/\d{2}/\d{4})',
-            r'Pay.*?by.*?(\d{2}/\d{2}/\d{4})'
+            r'Due Date{GAP}(\d{2}/\d{2}/\d{4})',
+            r'Pay{GAP}by{GAP}(\d{2}/\d{2}/\d{4})'
         ],
         'min_due': [
             r'Minimum Amount Due\s*:?\s*([\d,]+\.\d{2})',
-            r'Min.*?Due.*?([\d,]+\.\d{2})',
-            r'Minimum.*?([\d,]+\.\d{2})'
+            r'Min{GAP}Due{GAP}([\d,]+\.\d{2})',
+            r'Minimum{GAP}([\d,]+\.\d{2})'
         ],
         'credit_limit': [
             r'Credit Limit\s*:?\s*([\d,]+\.\d{2})',
-            r'Total.*?Limit.*?([\d,]+\.\d{2})'
+            r'Total{GAP}Limit{GAP}([\d,]+\.\d{2})'
         ],
         'available_limit': [
             r'Available Credit\s*:?\s*([\d,]+\.\d{2})',
-            r'Available.*?([\d,]+\.\d{2})'
+            r'Available{GAP}([\d,]+\.\d{2})'
         ]
     }
 }
 
+# Patterns are compiled once at import instead of on every search.
+# DOTALL is not used, so no gap can run (and backtrack) across the rest of the
+# document; {GAP} spans at most two line breaks.
+PATTERN_FLAGS = re.IGNORECASE | re.MULTILINE
+# The same flags inline, which every engine understands (re2 takes no flag ints)
+INLINE_PATTERN_FLAGS = '(?im)'
+LINE_GAP = r'(?:[^\n]*\n){0,2}?[^\n]*?'
+
+def _expand_pattern(pattern):
+    """Substitutes LINE_GAP for each {GAP} placeholder in a table pattern."""
+    return pattern.replace('{GAP}', LINE_GAP)
+
+# Every character str.isspace() (and so re's class \s) treats as whitespace,
+# including the PDF-common U+00A0
+UNICODE_WHITESPACE = (
+    '\t\n\x0b\x0c\r\x1c\x1d\x1e\x1f \x85\xa0\u1680'
+    '\u2000\u2001\u2002\u2003\u2004\u2005\u2006\u2007\u2008\u2009\u200a'
+    '\u2028\u2029\u202f\u205f\u3000'
+)
+# RE2's \s, \d and \w are ASCII-only, while re's match Unicode (statements
+# often separate labels and amounts with U+00A0). These are re's classes
+# spelled for RE2, without brackets so they also fit inside [...].
+_RE2_CLASS_ESCAPES = {
+    's': ''.join(f'\\x{{{ord(c):x}}}' for c in UNICODE_WHITESPACE),
+    'd': r'\p{Nd}',
+    'w': r'\p{L}\p{N}_',
+}
+
+def _re2_pattern(bounded):
+    """Rewrites re's Unicode shorthand classes in a pattern into RE2 syntax."""
+    parts = []
+    in_class = False
+    i = 0
+    while i < len(bounded):
+        char = bounded[i]
+        if char == '\\' and i + 1 < len(bounded):
+            escaped = bounded[i + 1]
+            if escaped in _RE2_CLASS_ESCAPES:
+                spelled = _RE2_CLASS_ESCAPES[escaped]
+                parts.append(spelled if in_class else f'[{spelled}]')
+            elif escaped.lower() in _RE2_CLASS_ESCAPES:
+                # Negated classes (\S, \D, \W) have no bracket-free spelling
+                raise ValueError(f"unsupported escape \\{escaped}")
+            else:
+                parts.append(bounded[i:i + 2])
+            i += 2
+            continue
+        if char == '[' and not in_class:
+            in_class = True
+            parts.append(char)
+            # A ']' right after '[' or '[^' is a literal, not the class end
+            if bounded.startswith('^', i + 1):
+                parts.append('^')
+                i += 1
+            if bounded.startswith(']', i + 1):
+                parts.append(']')
+                i += 1
+        elif char == ']' and in_class:
+            in_class = False
+            parts.append(char)
+        else:
+            parts.append(char)
+        i += 1
+    return ''.join(parts)
+
+def _compile_pattern(bounded):
+    """Compiles an expanded bank pattern."""
+    if pattern_engine is not re:
+        try:
+            return pattern_engine.compile(INLINE_PATTERN_FLAGS + _re2_pattern(bounded))
+        except Exception as e:
+            # RE2 rejects some constructs (e.g. backreferences); keep those on re
+            logger.debug(f"Compiling bank pattern with re instead: {e}")
+    return re.compile(bounded, PATTERN_FLAGS)
+
+# Literal anchors: the fixed text a pattern's matches must start with, used to
+# skip patterns whose anchor is absent and to start the others at its first hit
+_REGEX_METACHARACTERS = set('\\.^$*+?{}[]|()')
+# Characters IGNORECASE matches against an ASCII letter although lower() does
+# not map them to it; anchors cannot be looked up in text containing them
+_CASEFOLD_SPECIALS = ('\u0130', '\u0131', '\u017f')
+
+def _literal_prefix(pattern):
+    """Returns the lowercased literal text every match of `pattern` starts with ('' if none)."""
+    if '|' in pattern:
+        return ''
+    prefix = []
+    for char in pattern:
+        if char in _REGEX_METACHARACTERS:
+            # '*', '?' and '{m,n}' may drop the preceding character
+            if char in '*?{' and prefix:
+                prefix.pop()
+            break
+        prefix.append(char)
+    return ''.join(prefix).lower()
+
+# Each field maps to a list of (compiled pattern, literal anchor) pairs
+COMPILED_BANK_PATTERNS = {
+    bank: {
+        field: [
+            (_compile_pattern(expanded), _literal_prefix(expanded))
+            for expanded in map(_expand_pattern, pattern_list)
+        ]
+        for field, pattern_list in fields.items()
+    }
+    for bank, fields in COMPREHENSIVE_BANK_PATTERNS.items()
+}
+
+def _anchor_parents(anchors):
+    """Maps each anchor to the longest other anchor it starts with, if any."""
+    parents = {}
+    for anchor in anchors:
+        prefixes = [other for other in anchors if other != anchor and anchor.startswith(other)]
+        if prefixes:
+            parents[anchor] = max(prefixes, key=len)
+    return parents
+
+# Anchors shared across a bank's patterns form a prefix tree ('credit' ->
+# 'credit limit'), so each is looked up once per document from its parent's hit
+BANK_ANCHOR_PARENTS = {
+    bank: _anchor_parents({anchor for pattern_list in fields.values() for _, anchor in pattern_list if anchor})
+    for bank, fields in COMPILED_BANK_PATTERNS.items()
+}
+
 # --- DATE FORMAT CONFIGURATIONS ---
 DATE_FORMATS = [
     '%d %b %Y',         # 15 Jan 2024
@@ -330,6 +469,30 @@ DATE_FORMATS = [
     '%d.%m.%Y',         # 15.01.2024
 ]
 
+# Layout of a date string: digit runs become '9', letter runs 'a' and
+# whitespace runs a single space, e.g. '15 Jan 2024' -> '9 a 9'
+_DATE_SHAPE_TOKENS = re.compile(r'(\d+)|([^\W\d_]+)|(\s+)')
+
+def _date_shape(date_str):
+    """Reduces a date string to its layout of digit, letter and separator runs."""
+    return _DATE_SHAPE_TOKENS.sub(
+        lambda m: '9' if m.group(1) else 'a' if m.group(2) else ' ', date_str.strip()
+    )
+
+# Formats grouped by the layout they accept, keeping DATE_FORMATS priority
+DATE_FORMATS_BY_SHAPE = {}
+for _fmt in DATE_FORMATS:
+    _shape = re.sub(r'%[bB]', 'a', re.sub(r'%[dmY]', '9', _fmt))
+    DATE_FORMATS_BY_SHAPE.setdefault(_shape, []).append(_fmt)
+
+@lru_cache(maxsize=1024)
+def _date_formats_for(date_str):
+    """Returns the DATE_FORMATS that could parse `date_str`, in priority order."""
+    if not isinstance(date_str, str):
+        return DATE_FORMATS
+    # Unknown layouts fall back to trying every known format
+    return DATE_FORMATS_BY_SHAPE.get(_date_shape(date_str), DATE_FORMATS)
+
 # --- UTILITY FUNCTIONS ---
 def _clean_and_convert_date(date_str, date_format=None):
     """Helper function to parse and standardize date strings."""
@@ -343,8 +506,13 @@ def _clean_and_convert_date(date_str, date_format=None):
         except (ValueError, TypeError):
             pass
     
-    # Try all known formats
-    for fmt in DATE_FORMATS:
+    # Only try the formats that share the string's layout; strptime raising
+    # for every mismatched format is the slow part
+    try:
+        formats = _date_formats_for(date_str)
+    except TypeError:
+        formats = DATE_FORMATS
+    for fmt in formats:
         try:
             return datetime.strptime(date_str, fmt).strftime('%Y-%m-%d')
         except (ValueError, TypeError):
@@ -352,16 +520,29 @@ def _clean_and_convert_date(date_str, date_format=None):
     
     return None
 
+# Currency symbols, commas and whitespace
+_AMT_TRANS = str.maketrans('', '', '₹$,' + UNICODE_WHITESPACE)
+# Last resort for noisy amount strings ('Rs.1,234.00 Cr'): the first
+# well-formed amount inside them
+_NUM_SALVAGE = re.compile(r'[-+]?\d[\d,]*\.\d{2}')
+
 def _clean_and_convert_amount(amount_str):
     """Helper function to clean and convert amount strings to float."""
     if not amount_str:
         return None
     try:
-        # Remove currency symbols, commas, and extra spaces
-        cleaned = re.sub(r'[₹$,\s]', '', str(amount_str))
-        return float(cleaned)
+        # Remove currency symbols and commas; float() ignores surrounding spaces
+        cleaned = str(amount_str).replace(',', '').replace('₹', '').replace('$', '')
+        try:
+            return float(cleaned)
+        except ValueError:
+            # Spaces inside the number (e.g. '1 234.00') need the full cleanup
+            return float(cleaned.translate(_AMT_TRANS))
     except (ValueError, TypeError):
-        return None
+        pass
+    
+    match = _NUM_SALVAGE.search(str(amount_str))
+    return float(match.group().replace(',', '')) if match else None
 
 def _is_valid_date(date_str, statement_date_str=None):
     """Checks if a date is valid and reasonable."""
@@ -369,8 +550,9 @@ def _is_valid_date(date_str, statement_date_str=None):
         return False
     
     try:
-        parsed_date = datetime.strptime(date_str, '%Y-%m-%d')
-        current_date = datetime.now()
+        # Dates arrive normalized to YYYY-MM-DD, so skip strptime's format machinery
+        parsed_date = date.fromisoformat(date_str)
+        current_date = date.today()
         
         # Date cannot be more than 2 years in the future
         if parsed_date.year > current_date.year + 2:
@@ -382,7 +564,7 @@ def _is_valid_date(date_str, statement_date_str=None):
             
         # If statement date exists, due date must be on or after it
         if statement_date_str:
-            stmt_date = datetime.strptime(statement_date_str, '%Y-%m-%d')
+            stmt_date = date.fromisoformat(statement_date_str)
             if parsed_date < stmt_date:
                 return False
                 
@@ -390,43 +572,113 @@ def _is_valid_date(date_str, statement_date_str=None):
     except (ValueError, TypeError):
         return False
 
-def _extract_with_multiple_patterns(text, patterns):
-    """Try multiple regex patterns and return the first successful match."""
-    if isinstance(patterns, str):
-        patterns = [patterns]
-    
-    for pattern in patterns:
-        try:
-            match = re.search(pattern, text, re.IGNORECASE | re.MULTILINE | re.DOTALL)
-            if match:
-                return match
-        except Exception as e:
-            logger.debug(f"Pattern error: {e}")
-            continue
+def _anchor_search_text(text):
+    """Returns the lowercased text for anchor lookups, or None when it cannot be trusted."""
+    if any(char in text for char in _CASEFOLD_SPECIALS):
+        return None
+    return text.lower()
+
+def _anchor_locator(anchor_text, parents):
+    """Returns a function giving an anchor's first offset in `anchor_text` (-1 if absent).
+
+    Offsets are memoized per document. An anchor whose parent (prefix) anchor
+    is absent is absent too; otherwise its search resumes at the parent's hit.
+    """
+    positions = {'': 0}
+
+    def locate(anchor):
+        position = positions.get(anchor)
+        if position is None:
+            parent = parents.get(anchor)
+            start = locate(parent) if parent else 0
+            position = anchor_text.find(anchor, start) if start >= 0 else -1
+            positions[anchor] = position
+        return position
+
+    return locate
+
+def _line_end(text, offset):
+    """Returns the offset of the end of the line containing `offset`."""
+    end = text.find('\n', offset)
+    return len(text) if end < 0 else end
+
+def _extract_with_multiple_patterns(text, patterns, locate_anchor=None, endpos=None):
+    """Try multiple (pattern, anchor) pairs and return the first successful match.
+
+    With `locate_anchor` from _anchor_locator, patterns whose anchor is absent
+    are skipped and the rest start searching at the anchor's first occurrence.
+    Matches must end by `endpos` when it is given.
+    """
+    if endpos is None:
+        endpos = len(text)
+    for pattern, anchor in patterns:
+        pos = 0
+        if locate_anchor is not None:
+            pos = locate_anchor(anchor)
+            if pos < 0 or pos > endpos:
+                continue
+        match = pattern.search(text, pos, endpos)
+        if match:
+            return match
     
     return None
 
 # --- PDF TEXT EXTRACTION ---
-def _extract_text_from_pdf(pdf_path, password):
-    """Extracts text from a password-protected PDF using multiple methods."""
-    text = ""
+def _join_pages(page_texts):
+    """Joins non-empty page texts, each followed by a newline, in one pass."""
+    return "".join(f"{page_text}\n" for page_text in page_texts if page_text)
+
+def _is_password_error(error):
+    """Checks whether a pdfplumber failure was caused by a wrong password."""
+    # pdfplumber may wrap pdfminer's error, so look through a few nested causes
+    for _ in range(4):
+        if error is None:
+            break
+        if isinstance(error, PDFPasswordIncorrect) or 'password' in str(error).lower():
+            return True
+        nested = [arg for arg in error.args if isinstance(arg, BaseException)]
+        error = nested[0] if nested else (error.__cause__ or error.__context__)
+    return False
+
+def _iter_page_texts(pdf_source, password):
+    """Yields the non-empty text of each page of a password-protected PDF.
+
+    pdfplumber is tried first; PyPDF2 is only used when pdfplumber fails or
+    finds no text before yielding any, and never after a wrong password. Closing the generator early stops
+    extraction and releases the PDF.
+    """
+    is_stream = hasattr(pdf_source, 'read')
+    found_text = False
     
     # Method 1: Try pdfplumber (more accurate for layout)
     try:
-        with pdfplumber.open(pdf_path, password=password) as pdf:
+        if is_stream:
+            pdf_source.seek(0)
+        with pdfplumber.open(pdf_source, password=password) as pdf:
             for page in pdf.pages:
                 page_text = page.extract_text(x_tolerance=2, y_tolerance=2)
                 if page_text:
-                    text += page_text + "\n"
-        if text.strip():
-            return text
+                    found_text = found_text or bool(page_text.strip())
+                    yield page_text
+        if found_text:
+            return
     except Exception as e:
+        if found_text:
+            # Pages already handed out cannot be taken back; keep what we have
+            logger.debug(f"pdfplumber stopped early: {e}")
+            return
+        if _is_password_error(e):
+            # PyPDF2 would only decrypt again to reject the same password
+            logger.debug("pdfplumber rejected the password; skipping PyPDF2")
+            return
         # Expected for some encrypted PDFs; keep quiet
         logger.debug(f"pdfplumber failed: {e}. Trying PyPDF2...")
 
     # Method 2: Fallback to PyPDF2
     try:
-        with open(pdf_path, 'rb') as file:
+        # Streams belong to the caller, so only files we open get closed
+        with (nullcontext(pdf_source) if is_stream else open(pdf_source, 'rb')) as file:
+            file.seek(0)
             pdf_reader = PyPDF2.PdfReader(file)
             if pdf_reader.is_encrypted:
                 pdf_reader.decrypt(password)
@@ -434,90 +686,228 @@ def _extract_text_from_pdf(pdf_path, password):
             for page in pdf_reader.pages:
                 page_text = page.extract_text()
                 if page_text:
-                    text += page_text + "\n"
-        return text
+                    yield page_text
     except Exception as e:
         # Some PDFs will not decrypt with given password
         logger.debug(f"PyPDF2 failed: {e}")
-        return None
+
+def _extract_text_from_pdf(pdf_source, password):
+    """Extracts text from a password-protected PDF path or binary file-like object."""
+    return _join_pages(_iter_page_texts(pdf_source, password)) or None
 
 # --- COMPREHENSIVE PDF PARSING ---
-def parse_pdf_content(pdf_text, bank_name):
-    """Parses PDF text using comprehensive pattern matching for robustness."""
-    bank_key = bank_name.lower()
-    patterns = COMPREHENSIVE_BANK_PATTERNS.get(bank_key)
+# (pattern field, result key, converter) in extraction order. Each field keeps
+# first-pattern-wins priority; when a pattern has several groups the last one
+# holds the value (e.g. the last 4 card digits, or the due date of a pair).
+FIELD_EXTRACTORS = [
+    ('card_number', 'card_last4', None),
+    # Some banks (or certain formats) might not have a reliable statement_date field
+    ('statement_date', 'statement_date', _clean_and_convert_date),
+    ('due_date', 'due_date', _clean_and_convert_date),
+    ('total_due', 'total_due', _clean_and_convert_amount),
+    ('min_due', 'min_due', _clean_and_convert_amount),
+    ('credit_limit', 'credit_limit', _clean_and_convert_amount),
+    ('available_limit', 'available_limit', _clean_and_convert_amount),
+]
+
+# Statement fields sit in the header block, so each field is only searched
+# for within this many characters (stretched to the end of that line)
+FIELD_ENDPOS = {
+    'card_number': 8000,
+    'statement_date': 8000,
+    'due_date': 8000,
+    'total_due': 12000,
+    'min_due': 12000,
+    'credit_limit': 16000,
+    'available_limit': 16000,
+}
+
+# Per-bank overrides: ICICI's doubled-letter headings ('SSTTAATTEEMMEENNTT
+# DDAATTEE') can sit well past the summary block
+BANK_FIELD_ENDPOS = {
+    bank: dict(FIELD_ENDPOS, **overrides)
+    for bank, overrides in {
+        'icici': {'statement_date': 32000, 'due_date': 32000},
+    }.items()
+}
+
+# Interned bank keys; API entry points intern the caller's lowered bank name
+# so pattern-table lookups compare by identity
+BANK_KEYS = frozenset(map(sys.intern, COMPREHENSIVE_BANK_PATTERNS))
+
+# Display name stored in each result, computed once per bank
+BANK_DISPLAY_NAMES = {bank: bank.upper() for bank in COMPILED_BANK_PATTERNS}
+
+# One bit per result key, so field presence is tracked as a small int mask
+FIELD_BITS = {key: 1 << index for index, (_, key, _) in enumerate(FIELD_EXTRACTORS)}
+# Fields a statement must have to be accepted
+REQUIRED_MASK = FIELD_BITS['card_last4'] | FIELD_BITS['due_date']
+
+def parse_pdf_content(pdf_text, bank_key):
+    """Parses PDF text using comprehensive pattern matching for robustness.
+
+    `bank_key` is the lowercase bank name used in COMPREHENSIVE_BANK_PATTERNS.
+    """
+    return _parse_fields(pdf_text, bank_key)[0]
+
+# Default for _parse_fields: derive the anchor text from pdf_text itself
+_LOWER_TEXT = object()
+
+def _parse_fields(pdf_text, bank_key, anchor_text=_LOWER_TEXT):
+    """Parses PDF text; returns (result, mask of the FIELD_BITS that matched).
+
+    Callers that keep a lowered copy of `pdf_text` up to date (see
+    _anchor_search_text) pass it as `anchor_text`, or None to skip anchors.
+    """
+    patterns = COMPILED_BANK_PATTERNS.get(bank_key)
+    present = 0
 
     if not patterns:
-        logger.debug(f"No parsing patterns found for bank: {bank_name}")
-        return {}
+        logger.debug(f"No parsing patterns found for bank: {bank_key}")
+        return {}, present
 
-    result = {'bank_name': bank_name.upper()}
+    result = {'bank_name': BANK_DISPLAY_NAMES[bank_key]}
+    if anchor_text is _LOWER_TEXT:
+        anchor_text = _anchor_search_text(pdf_text)
+    locate_anchor = None
+    if anchor_text is not None:
+        locate_anchor = _anchor_locator(anchor_text, BANK_ANCHOR_PARENTS[bank_key])
     
-    # Extract card number with multiple pattern attempts
-    card_match = _extract_with_multiple_patterns(pdf_text, patterns['card_number'])
-    if card_match:
-        groups = card_match.groups()
-        if len(groups) == 1:
-            result['card_last4'] = groups[0]
-        elif len(groups) > 1:
-            # For patterns with multiple groups, use the last one (usually the last 4 digits)
-            result['card_last4'] = groups[-1]
+    field_endpos = BANK_FIELD_ENDPOS.get(bank_key, FIELD_ENDPOS)
     
-    # Extract dates
-    # Some banks (or certain formats) might not have a reliable statement_date field
-    stmt_match = _extract_with_multiple_patterns(pdf_text, patterns.get('statement_date', []))
-    due_match = _extract_with_multiple_patterns(pdf_text, patterns['due_date'])
+    # Single table-driven pass over the fields this bank defines patterns for
+    for field, key, convert in FIELD_EXTRACTORS:
+        endpos = _line_end(pdf_text, field_endpos[field])
+        match = _extract_with_multiple_patterns(pdf_text, patterns.get(field, ()), locate_anchor, endpos)
+        if match:
+            value = match.groups()[-1]
+            result[key] = convert(value) if convert else value
+            present |= FIELD_BITS[key]
     
-    if stmt_match:
-        result['statement_date'] = _clean_and_convert_date(stmt_match.group(1))
+    return result, present
+
+# Mask of the result keys each bank can fill, i.e. what a streaming parse waits for
+BANK_RESULT_MASKS = {
+    bank: sum(FIELD_BITS[key] for field, key, _ in FIELD_EXTRACTORS if field in fields)
+    for bank, fields in COMPILED_BANK_PATTERNS.items()
+}
+
+def parse_pdf_streaming(pdf_source, password, bank_key):
+    """Extracts and parses a PDF page by page, stopping once every field is found.
+
+    Returns (parsed_data, pdf_text) where pdf_text is the text read so far;
+    pdf_text is empty when nothing could be extracted.
+    """
+    return _stream_fields(pdf_source, password, bank_key)[:2]
+
+def _stream_fields(pdf_source, password, bank_key):
+    """Streaming parse behind parse_pdf_streaming; also returns the FIELD_BITS mask."""
+    wanted_mask = BANK_RESULT_MASKS.get(bank_key, 0)
+    # Text past every field's search window cannot change the result
+    text_limit = max(BANK_FIELD_ENDPOS.get(bank_key, FIELD_ENDPOS).values())
+    parsed_data = {}
+    present = 0
+    pdf_text = ""
+    # Lowered copy of pdf_text for anchor lookups, extended one page at a time
+    # so no page is lowered or scanned twice; None once a page rules it out
+    anchor_text = ""
     
-    if due_match:
-        groups = due_match.groups()
-        due_group = groups[0] if len(groups) == 1 else groups[-1]
-        result['due_date'] = _clean_and_convert_date(due_group)
+    pages = _iter_page_texts(pdf_source, password)
+    try:
+        for page_text in pages:
+            pdf_text += f"{page_text}\n"
+            if anchor_text is not None:
+                page_anchor_text = _anchor_search_text(page_text)
+                anchor_text = None if page_anchor_text is None else f"{anchor_text}{page_anchor_text}\n"
+            if not page_text.strip():
+                continue
+            parsed_data, present = _parse_fields(pdf_text, bank_key, anchor_text)
+            # Statement fields sit on the first page or two; skip the rest
+            if present & wanted_mask == wanted_mask or len(pdf_text) > text_limit:
+                break
+    finally:
+        pages.close()
     
-    # Extract amounts
-    total_match = _extract_with_multiple_patterns(pdf_text, patterns['total_due'])
-    if total_match:
-        groups = total_match.groups()
-        total_group = groups[0] if len(groups) == 1 else groups[-1]
-        result['total_due'] = _clean_and_convert_amount(total_group)
+    return parsed_data, pdf_text, present
+
+# Marks ICICI EMI amortization schedules, which arrive alongside statements;
+# searched case-insensitively in place rather than on a lowered copy
+_ICICI_AMORT = re.compile(r'amortization schedule', re.IGNORECASE)
+
+# Results of recent analyze_pdf calls keyed by (PDF digest, password, bank);
+# the oldest entry is evicted once the cache is full
+ANALYSIS_CACHE_SIZE = 256
+_ANALYSIS_CACHE = {}
+
+def _pdf_digest(pdf_source):
+    """Returns the SHA-1 hex digest of a PDF path or binary file-like object."""
+    if hasattr(pdf_source, 'getbuffer'):
+        # Hash BytesIO contents in place instead of copying them with read()
+        with pdf_source.getbuffer() as view:
+            return hashlib.sha1(view).hexdigest()
+    if hasattr(pdf_source, 'read'):
+        pdf_source.seek(0)
+        return hashlib.sha1(pdf_source.read()).hexdigest()
+    with open(pdf_source, 'rb') as file:
+        return hashlib.sha1(file.read()).hexdigest()
+
+def analyze_pdf(pdf_source, password, bank_name, pdf_text=None):
+    """Main function to analyze PDF statements - orchestrates the entire process.
+
+    `pdf_source` is either a file path or a binary file-like object (e.g. BytesIO).
+    Results are memoized by file content, so re-analyzing the same statement
+    (retries, several passwords tried twice) skips extraction and parsing.
+    Pass `pdf_text` when the text is already extracted to skip extraction.
+    """
+    bank_key = sys.intern(bank_name.lower())
+    if bank_key not in BANK_KEYS:
+        # Without patterns nothing could be parsed; skip opening the PDF
+        logger.debug(f"No parsing patterns found for bank: {bank_name}")
+        return None
     
-    # Extract optional fields
-    for field in ['min_due', 'credit_limit', 'available_limit']:
-        if field in patterns:
-            match = _extract_with_multiple_patterns(pdf_text, patterns[field])
-            if match:
-                groups = match.groups()
-                amount_group = groups[0] if len(groups) == 1 else groups[-1]
-                result[field] = _clean_and_convert_amount(amount_group)
+    if pdf_text is not None:
+        return _analyze_pdf_uncached(pdf_source, password, bank_key, pdf_text)
     
-    return result
+    try:
+        cache_key = (_pdf_digest(pdf_source), password, bank_key)
+        hash(cache_key)
+    except (OSError, TypeError):
+        # Unreadable sources (or unhashable passwords) skip the cache
+        return _analyze_pdf_uncached(pdf_source, password, bank_key)
+    
+    if cache_key in _ANALYSIS_CACHE:
+        parsed_data = _ANALYSIS_CACHE[cache_key]
+    else:
+        parsed_data = _analyze_pdf_uncached(pdf_source, password, bank_key)
+        if len(_ANALYSIS_CACHE) >= ANALYSIS_CACHE_SIZE:
+            del _ANALYSIS_CACHE[next(iter(_ANALYSIS_CACHE))]
+        _ANALYSIS_CACHE[cache_key] = parsed_data
+    
+    # Hand out copies so callers cannot alter the cached result
+    return dict(parsed_data) if parsed_data else parsed_data
 
-def analyze_pdf(pdf_path, password, bank_name):
-    """Main function to analyze PDF statements - orchestrates the entire process."""
+def _analyze_pdf_uncached(pdf_source, password, bank_key, pdf_text=None):
+    """Extracts (unless `pdf_text` is given), parses and validates one statement PDF."""
     # No verbose logging - silent operation
     
-    # Step 1: Extract text from PDF
-    pdf_text = _extract_text_from_pdf(pdf_path, password)
+    # Steps 1-2: Extract and parse page by page until every field is found
+    if pdf_text is None:
+        parsed_data, pdf_text, present = _stream_fields(pdf_source, password, bank_key)
+    else:
+        parsed_data, present = _parse_fields(pdf_text, bank_key)
     
     if not pdf_text:
         # Silent failure
         return None
 
     # Heuristic: Skip non-statement ICICI amortization schedule PDFs
-    if bank_name.lower() == 'icici' and 'amortization schedule' in pdf_text.lower():
+    if bank_key == 'icici' and _ICICI_AMORT.search(pdf_text):
         return None
     
-    # Step 2: Parse the extracted text
-    parsed_data = parse_pdf_content(pdf_text, bank_name)
-    
     # Step 3: Validate essential information - only require card_last4 and due_date
-    # Statement date is optional
-    essential_fields = ['card_last4', 'due_date']
-    missing_fields = [field for field in essential_fields if not parsed_data.get(field)]
-    
-    if missing_fields:
+    # Statement date is optional. A due date that matched but did not convert
+    # is None and fails the date validation below.
+    if present & REQUIRED_MASK != REQUIRED_MASK:
         # Silent failure - no logging
         return None
     
@@ -531,12 +921,13 @@ def analyze_pdf(pdf_path, password, bank_name):
     due_str = parsed_data.get('due_date')
     if stmt_str and due_str:
         try:
-            stmt = datetime.strptime(stmt_str, '%Y-%m-%d')
-            due = datetime.strptime(due_str, '%Y-%m-%d')
+            stmt = date.fromisoformat(stmt_str)
+            due = date.fromisoformat(due_str)
             # Only basic check that due date is on or after statement date
             if due < stmt:
+                pdf_name = pdf_source if isinstance(pdf_source, str) else 'in-memory PDF'
                 logger.debug(
-                    f"Due date before statement date for {os.path.basename(pdf_path)}"
+                    f"Due date before statement date for {os.path.basename(pdf_name)}"
                 )
                 return None
         except Exception:
@@ -544,30 +935,56 @@ def analyze_pdf(pdf_path, password, bank_name):
 
     return parsed_data
 
-def test_parsing_patterns(pdf_path, password, bank_name):
-    """Enhanced testing function for debugging patterns."""
-    print(f"\n{'='*80}")
-    print(f"COMPREHENSIVE PATTERN TEST - {bank_name.upper()}")
-    print(f"{'='*80}")
+def _analyze_job(job):
+    """Runs analyze_pdf on one (pdf_source, password, bank_name) job."""
+    return analyze_pdf(*job)
+
+def analyze_many(jobs, max_workers=None, mp_context=None):
+    """Analyzes (pdf_source, password, bank_name) jobs in parallel processes.
+
+    Sources must be picklable (paths or BytesIO). Results come back in job order.
+    Workers use forkserver (or spawn) unless `mp_context` says otherwise.
+    """
+    jobs = list(jobs)
+    if len(jobs) < 2:
+        return [_analyze_job(job) for job in jobs]
     
-    # Extract text
+    if mp_context is None:
+        # Callers may be multi-threaded, so workers must not be forked from
+        # them (a child could inherit a held lock)
+        start_method = 'forkserver' if 'forkserver' in multiprocessing.get_all_start_methods() else 'spawn'
+        mp_context = multiprocessing.get_context(start_method)
+    with ProcessPoolExecutor(max_workers=max_workers, mp_context=mp_context) as pool:
+        return list(pool.map(_analyze_job, jobs))
+
+def _extract_test_text(pdf_path, password):
+    """Extracts text for the test driver, trying each password.
+
+    Returns (text, password, status lines); the lines are printed by the caller
+    so they stay next to the report when this runs in a worker process.
+    """
     passwords_to_try = password if isinstance(password, list) else [password]
-    text = None
+    text = pwd = None
+    status = []
     for pwd in passwords_to_try:
         try:
             text = _extract_text_from_pdf(pdf_path, pwd)
             if text and len(text.strip()) > 100:
-                print(f"✓ Text extracted with password: {pwd}")
-                break
+                status.append(f"✓ Text extracted with password: {pwd}")
+                return text, pwd, status
         except Exception as e:
-            print(f"✗ Password '{pwd}' failed: {e}")
+            status.append(f"✗ Password '{pwd}' failed: {e}")
     
-    if not text:
-        print("✗ Could not extract any text")
-        return
+    return text, pwd, status
+
+def test_parsing_patterns(text, bank_name):
+    """Enhanced testing function for debugging patterns."""
+    print(f"\n{'='*80}")
+    print(f"COMPREHENSIVE PATTERN TEST - {bank_name.upper()}")
+    print(f"{'='*80}")
     
     # Test all patterns for this bank
-    patterns = COMPREHENSIVE_BANK_PATTERNS.get(bank_name.lower(), {})
+    patterns = COMPILED_BANK_PATTERNS.get(sys.intern(bank_name.lower()), {})
     if not patterns:
         print(f"✗ No patterns found for {bank_name}")
         return
@@ -576,23 +993,27 @@ def test_parsing_patterns(pdf_path, password, bank_name):
     for field, pattern_list in patterns.items():
         print(f"\n--- {field.upper()} ---")
         match_found = False
-        for i, pattern in enumerate(pattern_list):
-            try:
-                match = re.search(pattern, text, re.IGNORECASE | re.MULTILINE | re.DOTALL)
-                if match:
-                    groups = match.groups()
-                    result = groups[0] if len(groups) == 1 else groups
-                    print(f"✓ Pattern {i+1}: {result}")
-                    match_found = True
-                    break
-                else:
-                    print(f"✗ Pattern {i+1}: No match")
-            except Exception as e:
-                print(f"✗ Pattern {i+1}: Error - {e}")
+        for i, (pattern, _) in enumerate(pattern_list):
+            match = pattern.search(text)
+            if match:
+                groups = match.groups()
+                result = groups[0] if len(groups) == 1 else groups
+                print(f"✓ Pattern {i+1}: {result}")
+                match_found = True
+                break
+            else:
+                print(f"✗ Pattern {i+1}: No match")
         
         if not match_found:
             print(f"  → All patterns failed for {field}")
 
+def _process_test_case(bank, filepath, password):
+    """Extracts one test PDF and parses it; runs in a worker process."""
+    # Extract once and share the text between the pattern test and the parser
+    text, text_password, status = _extract_test_text(filepath, password)
+    data = analyze_pdf(filepath, text_password, bank, pdf_text=text) if text else None
+    return bank, text, data, status
+
 # --- STANDALONE TESTING ---
 if __name__ == '__main__':
     print("--- Comprehensive Parser Test Mode ---")
@@ -616,19 +1037,34 @@ if __name__ == '__main__':
             ('bob', 'examples/BOB.pdf', rahul_passwords.get('bob', 'default')),
         ]
         
+        present_cases = []
         for bank, filepath, password in test_cases:
             if os.path.exists(filepath):
-                # Run comprehensive pattern test
-                test_parsing_patterns(filepath, password, bank)
-                
-                # Run actual parsing
-                data = analyze_pdf(filepath, password, bank)
-                if data:
-                    print(f"\n--- PARSED RESULT for {bank.upper()} ---")
-                    print(json.dumps(data, indent=2))
-                    print("-" * 50)
+                present_cases.append((bank, filepath, password))
             else:
                 print(f"Test file not found: {filepath}")
+        
+        # Each PDF is extracted and parsed in its own worker; results are
+        # reported in the main process as they complete
+        if present_cases:
+            with ProcessPoolExecutor(max_workers=min(len(present_cases), os.cpu_count() or 1)) as pool:
+                futures = [pool.submit(_process_test_case, *case) for case in present_cases]
+                for future in as_completed(futures):
+                    bank, text, data, status = future.result()
+                    for line in status:
+                        print(line)
+                    if not text:
+                        print(f"✗ Could not extract any text for {bank.upper()}")
+                        continue
+                    
+                    # Run comprehensive pattern test
+                    test_parsing_patterns(text, bank)
+                    
+                    # Report actual parsing
+                    if data:
+                        print(f"\n--- PARSED RESULT for {bank.upper()} ---")
+                        print(json.dumps(data, indent=2))
+                        print("-" * 50)
                 
     except FileNotFoundError as e:
         print(f"Configuration file missing: {e}")